@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# apply_json_module_all_fixes.py
+# Applies the fixes of apply_json_module_conditional_fix.py, apply_json_module_patch_v2.py,
+# apply_json_module_get_settings_guard.py and apply_json_module_prefill_fix.py in a single pass:
+# one backup, one read, one write of lean/models/json_module.py.
+# json_module_patch.py has no entry of its own: it rewrites the same 'is_empty' block with the same code as
+# apply_json_module_patch_v2.py, only with a stricter pattern, so the patch-v2 entry covers it. Once patch-v2
+# has run, the pattern of json_module_patch.py no longer matches and running it afterwards is a no-op.
+#
+# Usage: run from repo root: python apply_json_module_all_fixes.py
+
+from pathlib import Path
+import os, re, shutil, time, sys
+
+TARGET = Path("lean/models/json_module.py")
+
+# conditional fix: the 'for option in config._value_options:' loop of the InternalInputUserInput block
+_LOOP_RE = re.compile(
+    r"(?P<indent>^[ \t]*)for\s+option\s+in\s+config\._value_options:\s*\n"  # for line and indent
+    r"(?P<body>(?:^(?P=indent)[ \t]+.*\n)+?)"  # body lines with greater indent
+    r"(?=^(?P=indent)[ \t]*\S)",                # lookahead: next top-level line (same indent) starts non-space
+    re.MULTILINE
+)
+_LOOSE_RE = re.compile(
+    r"(?P<indent>^[ \t]*)for\s+option\s+in\s+config\._value_options:\s*\n(.*?)(?=^[ \t]*\S)",
+    re.MULTILINE | re.DOTALL
+)
+
+# patch v2: the block from 'is_empty = ...' until the next 'configuration._value = ...' line
+_IS_EMPTY_RE = re.compile(
+    r"(is_empty\s*=.*?\n)"
+    r"(.*?)"
+    r"(\n\s*configuration\._value\s*=[^\n]*)",
+    re.DOTALL | re.IGNORECASE
+)
+
+# get_settings guard: the 'No condition matched' raise, strict and generic message in one alternation
+_RAISE_RE = re.compile(
+    r"(?P<indent>^[ \t]*)"
+    r"(?:raise ValueError\(\s*f'No condition matched among present options for \"(?P<cfgid>[^\"']+)\"\. Please review \"(?P<dep>[^\"']+)\" given value \"\"\s*'\)"
+    r"|raise ValueError\(\s*f'No condition matched among present options for \"(?P<cfgid2>[^\"']+)\"\. Please review .+?'\))[ \t]*\n",
+    re.MULTILINE
+)
+
+# prefill fix: the conditional InternalInputUserInput evaluation
+_PREFILL_ANCHOR_RE = re.compile(r"^(?P<indent>[ \t]*)if type\(config\) is InternalInputUserInput:", re.MULTILINE)
+
+
+def _loop_repl(m):
+    indent = m.group("indent")
+    inner = indent + " " * 4
+    return f"""{indent}for option in config._value_options:
+{inner}# Use get_default(...) for the dependency check so CLI options and lean.json
+{inner}# environment properties are considered (_value is only set later).
+{inner}dependent_id = option._condition._dependent_config_id
+{inner}try:
+{inner}    dependent_value = self.get_default(
+{inner}        lean_config, dependent_id, environment_name, logger
+{inner}    )
+{inner}except Exception:
+{inner}    # Fallback: if get_default fails, use the previous lookup
+{inner}    try:
+{inner}        dependent_value = self.get_config_value_from_name(dependent_id)
+{inner}    except Exception:
+{inner}        dependent_value = None
+{inner}
+{inner}if option._condition.check(dependent_value):
+{inner}    config._value = option._value
+{inner}    break
+"""
+
+
+_IS_EMPTY_REPLACEMENT = """# Empty/None check: an empty string does not automatically count as "missing"
+        # if the key is explicitly present in the lean.json environment properties.
+        is_empty = user_choice is None or (isinstance(user_choice, str) and user_choice.strip() == "")
+
+        # Explicitly check whether this key is present in the lean.json environment (properties).
+        env_has_key = False
+        try:
+            environment_name_local = environment_name if 'environment_name' in globals() else None
+            envs = lean_config.get('environments') or {}
+            env_block = envs.get(environment_name_local) if isinstance(envs, dict) else None
+            if env_block and isinstance(env_block, dict):
+                env_props = env_block.get('properties', {}) or {}
+                if configuration._id in env_props:
+                    env_has_key = True
+        except Exception:
+            env_has_key = False
+
+        if is_empty:
+            if interactive:
+                default_value = configuration._input_default
+                user_choice = configuration.ask_user_for_input(default_value, logger, hide_input=hide_input)
+
+                if not isinstance(configuration, BrokerageEnvConfiguration):
+                    self._save_property({f"{configuration._id}": user_choice})
+            else:
+                # Non-interactive mode:
+                # If the configuration is optional, allow it to be empty (connect-only scenarios)
+                # Otherwise require it — UNLESS the key is present in lean.json environment properties.
+                if configuration._optional:
+                    if configuration._input_default is not None:
+                        user_choice = configuration._input_default
+                    # else keep empty
+                else:
+                    if env_has_key:
+                        # explicit empty string in lean.json counts as "provided" (connect-only)
+                        # keep user_choice as empty string and do NOT add to missing_options
+                        pass
+                    else:
+                        missing_options.append(f"--{configuration._id}")
+
+        configuration._value = user_choice"""
+
+
+def _is_empty_repl(m):
+    return _IS_EMPTY_REPLACEMENT
+
+
+def _raise_repl(m):
+    indent = m.group("indent")
+    return (
+        f"{indent}# --- BEGIN: tolerant fallback inserted by apply_json_module_all_fixes.py ---\n"
+        f"{indent}logger.warning(\n"
+        f"{indent}    f'No conditional option matched for \"{{config._id}}\" during get_settings().'\n"
+        f"{indent}    ' This can happen in non-interactive runs when the dependent config is empty.'\n"
+        f"{indent})\n"
+        f"{indent}# Fail-safe: treat as explicitly provided empty string so non-interactive deploy continues.\n"
+        f"{indent}config._value = \"\"\n"
+        f"{indent}# --- END: tolerant fallback ---\n"
+    )
+
+
+def _prefill_repl(m):
+    indent = m.group("indent")
+    return (
+        f"{indent}# --- PRE-FILL config values from lean_config before conditional evaluation ---\n"
+        f"{indent}for _cfg in self._lean_configs:\n"
+        f"{indent}    if _cfg._value is None:\n"
+        f"{indent}        try:\n"
+        f"{indent}            _cfg._value = self.get_default(lean_config, _cfg._id, environment_name, logger)\n"
+        f"{indent}        except Exception:\n"
+        f"{indent}            pass\n"
+        f"{indent}# --- END PRE-FILL ---\n"
+        f"\n"
+        f"{m.group(0)}"
+    )
+
+
+# (name, literal marker, patterns tried in order, replacement builder)
+PATCHES = (
+    ("conditional-fix", "for option in config._value_options:", (_LOOP_RE, _LOOSE_RE), _loop_repl),
+    ("patch-v2", "is_empty", (_IS_EMPTY_RE,), _is_empty_repl),
+    ("get-settings-guard", "No condition matched among present options", (_RAISE_RE,), _raise_repl),
+    ("prefill-fix", "if type(config) is InternalInputUserInput:", (_PREFILL_ANCHOR_RE,), _prefill_repl),
+)
+
+if not TARGET.exists():
+    print("ERROR: lean/models/json_module.py not found. Please run from the lean-cli repository root.")
+    sys.exit(2)
+
+text = TARGET.read_text(encoding="utf-8")
+original = text
+
+for name, marker, patterns, repl in PATCHES:
+    n = 0
+    if marker in text:
+        for rx in patterns:
+            text, n = rx.subn(repl, text, count=1)
+            if n:
+                break
+    print(f"{name}: {'applied' if n else 'not found, skipped'}")
+
+if text == original:
+    print("No patch applied, lean/models/json_module.py left untouched.")
+    sys.exit(3)
+
+bak = TARGET.with_suffix(".py.bak." + str(int(time.time())))
+shutil.copyfile(TARGET, bak)
+print(f"Backup created: {bak}")
+
+tmp = TARGET.with_suffix(".py.tmp")
+tmp.write_text(text, encoding="utf-8")
+os.replace(tmp, TARGET)
+print("Patches applied: lean/models/json_module.py updated.")
+print("\nRollback (if needed):")
+print(f"     cp {bak} lean/models/json_module.py")
@@ -6,62 +6,43 @@
 # Usage: run from repo root: python apply_json_module_conditional_fix.py
 
 from pathlib import Path
-import re, shutil, time, sys
+import mmap, os, re, shutil, time, sys
 
 TARGET = Path("lean/models/json_module.py")
-if not TARGET.exists():
-    print("❗ Datei lean/models/json_module.py nicht gefunden. Bitte im Verzeichnis ~/git/lean-cli ausführen.")
-    sys.exit(2)
-
-# Backup
-bak = TARGET.with_suffix(".py.bak." + str(int(time.time())))
-shutil.copy2(TARGET, bak)
-print(f"Backup erstellt: {bak}")
-
-text = TARGET.read_text(encoding="utf-8")
 
 # We try to locate the 'for option in config._value_options:' loop inside the
 # earlier block that handles InternalInputUserInput/_is_conditional.
 # We'll keep indentation robust by capturing the indent of the 'for' line.
-pattern = re.compile(
-    r"(?P<indent>^[ \t]*)for\s+option\s+in\s+config\._value_options:\s*\n"  # for line and indent
-    r"(?P<body>(?:^(?P=indent)[ \t]+.*\n)+?)"  # body lines with greater indent
-    r"(?=^(?P=indent)[ \t]*\S)",                # lookahead: next top-level line (same indent) starts non-space
+# The patterns are bytes patterns: the file is scanned through an mmap, so only
+# the captured groups need to be decoded.
+_LOOP_RE = re.compile(
+    rb"(?P<indent>^[ \t]*)for\s+option\s+in\s+config\._value_options:\s*\n"  # for line and indent
+    rb"(?P<body>(?:^(?P=indent)[ \t]+.*\n)+?)"  # body lines with greater indent
+    rb"(?=^(?P=indent)[ \t]*\S)",                # lookahead: next top-level line (same indent) starts non-space
     re.MULTILINE
 )
+# fallback: looser search for the first occurrence of "for option in config._value_options"
+_LOOSE_RE = re.compile(
+    rb"(^[ \t]*)for\s+option\s+in\s+config\._value_options:\s*\n(.*?)(?=^[ \t]*\S)",
+    re.MULTILINE | re.DOTALL
+)
 
-m = pattern.search(text)
-if not m:
-    # fallback: looser search for the first occurrence of "for option in config._value_options"
-    print("Hinweis: exaktes Pattern nicht gefunden, versuche lockeres Matching...")
-    m2 = re.search(r"(^[ \t]*)for\s+option\s+in\s+config\._value_options:\s*\n(.*?)(?=^[ \t]*\S)",
-                   text, re.MULTILINE | re.DOTALL)
-    if not m2:
-        print("❗ Konnte die 'for option in config._value_options:'-Schleife nicht finden.")
-        print("Bitte poste die Ausgabe von:\n  sed -n '320,460p' lean/models/json_module.py")
-        sys.exit(3)
-    indent = m2.group(1)
-    body = m2.group(2)
-    start_idx = m2.start(0)
-    end_idx = m2.end(0)
-else:
-    indent = m.group("indent")
-    body = m.group("body")
-    start_idx = m.start(0)
-    end_idx = m.end(0)
+if not TARGET.exists():
+    print("❗ Datei lean/models/json_module.py nicht gefunden. Bitte im Verzeichnis ~/git/lean-cli ausführen.")
+    sys.exit(2)
 
-# Show snippet we found (brief)
-print("\n--- Gefundener Block (erste 8 Zeilen):")
-for i, ln in enumerate(body.splitlines()[:8]):
-    print(f"{i+1:2d}: {ln}")
-print("...")
+# Backup
+bak = TARGET.with_suffix(".py.bak." + str(int(time.time())))
+shutil.copyfile(TARGET, bak)
+print(f"Backup erstellt: {bak}")
 
-# Build replacement preserving indent
-# replacement will use same indent + one level of extra indentation (indent + 4 spaces or a tab)
-# detect whether indent uses tabs or spaces; for the inner indent we add 4 spaces
-inner = indent + " " * 4
 
-replacement_block = f"""{indent}for option in config._value_options:
+def _replacement_block(indent):
+    # Build replacement preserving indent
+    # replacement will use same indent + one level of extra indentation (indent + 4 spaces or a tab)
+    # detect whether indent uses tabs or spaces; for the inner indent we add 4 spaces
+    inner = indent + " " * 4
+    return f"""{indent}for option in config._value_options:
 {inner}# Verwende get_default(...) für die Abhängigkeitsprüfung, damit CLI-Optionen
 {inner}# oder lean.json environment properties berücksichtigt werden (sonst greift die
 {inner}# Prüfung auf _value, das erst später gesetzt wird).
@@ -82,24 +63,57 @@ replacement_block = f"""{indent}for option in config._value_options:
 {inner}    break
 """
 
-# Replace the first occurrence between start_idx and end_idx
-new_text = text[:start_idx] + replacement_block + text[end_idx:]
 
-if new_text == text:
+found = {}
+
+
+def _replacement_builder(m):
+    # remember what was matched for the report below (the mmap is closed by then)
+    replacement = _replacement_block(m.group(1).decode("utf-8")).encode("utf-8")
+    found.update(body=m.group(2).decode("utf-8"), start=m.start(0), unchanged=replacement == m.group(0))
+    return replacement
+
+
+with open(TARGET, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    # cheap literal check first: skip the regex scans entirely if the loop is absent
+    if mm.find(b"for option in config._value_options:") == -1:
+        print("❗ Konnte die 'for option in config._value_options:'-Schleife nicht finden.")
+        print("Bitte poste die Ausgabe von:\n  sed -n '320,460p' lean/models/json_module.py")
+        sys.exit(3)
+
+    # Replace the first occurrence
+    new_text, n = _LOOP_RE.subn(_replacement_builder, mm, count=1)
+    if n == 0:
+        print("Hinweis: exaktes Pattern nicht gefunden, versuche lockeres Matching...")
+        new_text, n = _LOOSE_RE.subn(_replacement_builder, mm, count=1)
+        if n == 0:
+            print("❗ Konnte die 'for option in config._value_options:'-Schleife nicht finden.")
+            print("Bitte poste die Ausgabe von:\n  sed -n '320,460p' lean/models/json_module.py")
+            sys.exit(3)
+
+# Show snippet we found (brief)
+print("\n--- Gefundener Block (erste 8 Zeilen):")
+for i, ln in enumerate(found["body"].splitlines()[:8]):
+    print(f"{i+1:2d}: {ln}")
+print("...")
+
+if found["unchanged"]:
     print("❗ Ersetzung hat keine Änderung erzeugt (Text unverändert). Abbruch.")
     sys.exit(4)
 
-TARGET.write_text(new_text, encoding="utf-8")
+tmp = TARGET.with_suffix(".py.tmp")
+tmp.write_bytes(new_text)
+os.replace(tmp, TARGET)
 print("✅ Änderung angewendet: lean/models/json_module.py aktualisiert.\n")
 
-# Show context around where we replaced (lines)
-lines = new_text.splitlines()
-line_no = new_text[:start_idx].count("\n")
-start = max(0, line_no - 4)
-end = min(len(lines), line_no + 30)
+# Show context around where we replaced (lines); only the shown lines are decoded
+start_idx = found["start"]
+line_no = new_text.count(b"\n", 0, start_idx)
+before = new_text[:start_idx].rsplit(b"\n", 5)[-5:-1]
+after = new_text[start_idx:].split(b"\n", 30)[:30]
 print("---- Kontext (Zeilen um die Änderung):")
-for i in range(start, end):
-    print(f"{i+1:04d}: {lines[i]}")
+for i, ln in enumerate(before + after, start=line_no - len(before)):
+    print(f"{i+1:04d}: {ln.decode('utf-8')}")
 
 print("\nNächste Schritte:")
 print("1) Test: führe den deploy-Aufruf erneut (wie vorher).")
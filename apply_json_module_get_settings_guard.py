@@ -12,6 +12,17 @@ Creates a timestamped backup before editing.
 """
 import io, os, re, time, sys
 from pathlib import Path
+
+# Find the specific ValueError raise block that matches the pattern seen in logs, with its indentation.
+# The second alternative is the generic raise, for when the exact formatted message is not present,
+# so a single pass over the file covers both cases. Same pattern as in apply_json_module_all_fixes.py.
+_RAISE_RE = re.compile(
+    r"(?P<indent>^[ \t]*)"
+    r"(?:raise ValueError\(\s*f'No condition matched among present options for \"(?P<cfgid>[^\"']+)\"\. Please review \"(?P<dep>[^\"']+)\" given value \"\"\s*'\)"
+    r"|raise ValueError\(\s*f'No condition matched among present options for \"(?P<cfgid2>[^\"']+)\"\. Please review .+?'\))[ \t]*\n",
+    re.MULTILINE
+)
+
 p = Path(__file__).resolve().parents[0] / "lean" / "models" / "json_module.py"
 if not p.exists():
     print("ERROR: file not found:", p)
@@ -20,58 +31,47 @@ if not p.exists():
 bak = str(p) + ".bak." + str(int(time.time()))
 print("Backup created:", bak)
 import shutil
-shutil.copy2(str(p), bak)
+shutil.copyfile(str(p), bak)
 
 text = p.read_text(encoding="utf-8")
 
-# Find the specific ValueError raise block that matches the pattern seen in logs.
-# We'll replace the 'raise ValueError(...)' block with a guarded fallback.
-pattern = re.compile(
-    r"(raise ValueError\(\s*f'No condition matched among present options for \"(?P<cfgid>[^\"']+)\"\. Please review \"(?P<dep>[^\"']+)\" given value \"\"\s*'\)\s*)",
-    re.MULTILINE
-)
-
-if not pattern.search(text):
-    # If the exact formatted message is not present, search for the generic raise in the same function context.
-    alt_pattern = re.compile(
-        r"(raise ValueError\(\s*f'No condition matched among present options for \"(?P<cfgid>[^\"']+)\"\. Please review .+?'\)\s*)",
-        re.MULTILINE
+# We'll replace the 'raise ValueError(...)' block with a guarded fallback that logs a warning
+# and sets config._value = "" (config is the loop variable in get_settings), at the indentation of the raise.
+# Emits the same code as the get-settings-guard patch of apply_json_module_all_fixes.py.
+def _replacement_builder(m):
+    indent = m.group("indent")
+    return (
+        f"{indent}# --- BEGIN: tolerant fallback inserted by apply_json_module_get_settings_guard.py ---\n"
+        f"{indent}logger.warning(\n"
+        f"{indent}    f'No conditional option matched for \"{{config._id}}\" during get_settings().'\n"
+        f"{indent}    ' This can happen in non-interactive runs when the dependent config is empty.'\n"
+        f"{indent})\n"
+        f"{indent}# Fail-safe: treat as explicitly provided empty string so non-interactive deploy continues.\n"
+        f"{indent}config._value = \"\"\n"
+        f"{indent}# --- END: tolerant fallback ---\n"
     )
-    if not alt_pattern.search(text):
-        print("Could not find the exact ValueError raise to replace. Aborting to avoid accidental edits.")
-        print("You can inspect lean/models/json_module.py and run this script again after adjusting.")
-        sys.exit(3)
-    else:
-        match = alt_pattern.search(text)
-        cfgid = match.group("cfgid")
-        start, end = match.span(1)
-else:
-    match = pattern.search(text)
-    cfgid = match.group("cfgid")
-    start, end = match.span(1)
 
-# We'll insert replacement code that logs a warning and sets configuration._value = ""
-replacement = (
-    "# --- BEGIN: tolerant fallback inserted by apply_json_module_get_settings_guard.py ---\n"
-    "logger.warning(\n"
-    "    f'No conditional option matched for \"{cfgid}\" during get_settings().'\n"
-    "    ' This can happen in non-interactive runs when the dependent config is empty.'\n"
-    ")\n"
-    "# Fail-safe: treat as explicitly provided empty string so non-interactive deploy continues.\n"
-    "configuration._value = \"\"\n"
-    "# --- END: tolerant fallback ---\n"
-)
 
-# Replace the raise statement with the fallback. Be conservative: replace only the matched span.
-new_text = text[:start] + replacement + text[end:]
+# Replace the raise statement with the fallback. Be conservative: replace only the first match.
+n = 0
+# cheap literal check first: skip the regex scan entirely if the message is absent
+if "No condition matched among present options" in text:
+    new_text, n = _RAISE_RE.subn(_replacement_builder, text, count=1)
+if n == 0:
+    print("Could not find the exact ValueError raise to replace. Aborting to avoid accidental edits.")
+    print("You can inspect lean/models/json_module.py and run this script again after adjusting.")
+    sys.exit(3)
 
 # Sanity-check: ensure file still contains the get_settings() function signature
-if "def get_settings(self) -> Dict[str, str]:" not in new_text:
+if "def get_settings(" not in new_text:
     print("Sanity check failed: get_settings() signature not found after edit. Aborting and restoring backup.")
-    shutil.copy2(bak, str(p))
+    shutil.copyfile(bak, str(p))
     sys.exit(4)
 
-p.write_text(new_text, encoding="utf-8")
+# write to a sibling temp file and swap it in atomically, so a crash never leaves a half-written file
+tmp = p.with_suffix(".py.tmp")
+tmp.write_text(new_text, encoding="utf-8")
+os.replace(tmp, p)
 print("Patch applied. Please run quick import test:")
 print()
 print("  python - <<'PY'\n  import lean.models.json_module\n  print('json_module import OK')\n  PY")
@@ -2,43 +2,43 @@
 # apply_json_module_patch_v2.py
 # Robust patcher: ersetzt die logic rund um is_empty / missing_options
 from pathlib import Path
-import re, shutil, time, sys
+import mmap, os, re, shutil, time, sys
 
 P = Path("lean/models/json_module.py")
+
+# flexible search: find 'is_empty' line and the block until the next 'configuration._value = ...' line
+# we allow arbitrary whitespace and comments in between; a single pattern covers both the exact
+# 'is_empty = user_choice is None or (...)' form and looser variants, so the file is scanned once
+# (bytes pattern: the file is scanned through an mmap without decoding it)
+_IS_EMPTY_RE = re.compile(
+    rb"(is_empty\s*=.*?\n)"                             # the is_empty line
+    rb"(.*?)"                                           # anything in between (non-greedy)
+    rb"(\n\s*configuration\._value\s*=[^\n]*)",          # the assignment line we stop at (include newline before)
+    re.DOTALL | re.IGNORECASE
+)
+
 if not P.exists():
     print("❗ Datei lean/models/json_module.py nicht gefunden. Bitte im Verzeichnis ~/git/lean-cli ausführen.")
     sys.exit(2)
 
 bak = P.with_suffix(".py.bak." + str(int(time.time())))
-shutil.copy2(P, bak)
+shutil.copyfile(P, bak)
 print(f"Backup erstellt: {bak}")
 
-text = P.read_text(encoding="utf-8")
-
-# flexible search: find 'is_empty' line and the block until 'configuration._value = user_choice'
-# we allow arbitrary whitespace and comments in between
-pattern = re.compile(
-    r"(is_empty\s*=\s*user_choice\s+is\s+None\s+or\s+\(.*?\)\s*\n)"   # the is_empty line (loose)
-    r"(.*?)"                                                         # anything in between (non-greedy)
-    r"(\n\s*configuration\._value\s*=\s*user_choice)",                # the line we stop at (include newline before)
-    re.DOTALL | re.IGNORECASE
-)
+with open(P, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    # cheap literal check first: skip the regex scans entirely if the markers are absent
+    if mm.find(b"is_empty") == -1 or mm.find(b"configuration._value") == -1:
+        print("❗ Konnte weder das erwartete 'is_empty' Block noch 'configuration._value' finden.")
+        print("Bitte poste die Zeilen 1..520 von lean/models/json_module.py hier (oder mindestens 320..460).")
+        sys.exit(3)
 
-m = pattern.search(text)
-if not m:
-    # Try even looser: find 'is_empty' anywhere and then find next 'configuration._value'
-    print("Warnung: exakter Pattern-Search für 'is_empty' nicht erfolgreich. Versuche looseres Matching...")
-    pattern2 = re.compile(r"(is_empty\s*=.*?\n)(.*?)(\n\s*configuration\._value\s*=)", re.DOTALL | re.IGNORECASE)
-    m2 = pattern2.search(text)
-    if not m2:
+    m = _IS_EMPTY_RE.search(mm)
+    if not m:
         print("❗ Konnte weder das erwartete 'is_empty' Block noch 'configuration._value' finden.")
         print("Bitte poste die Zeilen 1..520 von lean/models/json_module.py hier (oder mindestens 320..460).")
         sys.exit(3)
-    start_idx = m2.start(1)
-    end_idx = m2.end(3)
-else:
-    start_idx = m.start(1)
-    end_idx = m.end(3)
+    head = mm[:m.start(1)]
+    tail = mm[m.end(3):]
 
 # prepare replacement block
 replacement = r"""# Leer-/None-Check: Empty string gilt nicht automatisch als "fehlend",
@@ -84,16 +84,19 @@ replacement = r"""# Leer-/None-Check: Empty string gilt nicht automatisch als "f
         configuration._value = user_choice"""
 
 # perform replacement
-new_text = text[:start_idx] + replacement + text[end_idx:]
-
-P.write_text(new_text, encoding="utf-8")
+tmp = P.with_suffix(".py.tmp")
+with open(tmp, "wb") as f:
+    f.write(head)
+    f.write(replacement.encode("utf-8"))
+    f.write(tail)
+os.replace(tmp, P)
 print("✅ Patch angewendet (robust). Zeige Kontext (nächste 30 Zeilen):")
-lines = new_text.splitlines()
-# find where replacement begins to display context
-line_no = new_text[:start_idx].count("\n")
-start = max(0, line_no - 3)
-end = min(len(lines), line_no + 40)
-for i in range(start, end):
-    print(f"{i+1:4d}: {lines[i]}")
+# find where replacement begins to display context; only the shown lines are decoded
+line_no = head.count(b"\n")
+*before, partial = head.rsplit(b"\n", 4)[-4:]
+after = partial + replacement.encode("utf-8") + b"\n".join(tail.split(b"\n", 40)[:40])
+lines = [ln.decode("utf-8") for ln in before] + after.decode("utf-8").split("\n")[:40]
+for i, ln in enumerate(lines, start=line_no - len(before)):
+    print(f"{i+1:4d}: {ln}")
 print("\nFalls du möchtest, committe die Änderung:\n  git add lean/models/json_module.py && git commit -m \"fix: allow empty env props as provided\"\n")
 
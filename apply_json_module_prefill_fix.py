@@ -6,7 +6,7 @@
 # This avoids broken condition checks (ib-agent-description / ib-account).
 
 from pathlib import Path
-import shutil, time, sys
+import os, shutil, time, sys
 
 TARGET = Path("lean/models/json_module.py")
 if not TARGET.exists():
@@ -14,34 +14,33 @@ if not TARGET.exists():
     sys.exit(1)
 
 backup = TARGET.with_suffix(".py.bak." + str(int(time.time())))
-shutil.copy2(TARGET, backup)
+shutil.copyfile(TARGET, backup)
 print(f"Backup created: {backup}")
 
-text = TARGET.read_text(encoding="utf-8").splitlines()
+text = TARGET.read_text(encoding="utf-8")
 
-out = []
-inserted = False
-
-for line in text:
-    out.append(line)
-
-    # Insert just BEFORE conditional InternalInputUserInput evaluation
-    if "if type(config) is InternalInputUserInput:" in line and not inserted:
-        out.append("")
-        out.append("        # --- PRE-FILL config values from lean_config before conditional evaluation ---")
-        out.append("        for _cfg in self._lean_configs:")
-        out.append("            if _cfg._value is None:")
-        out.append("                try:")
-        out.append("                    _cfg._value = self.get_default(lean_config, _cfg._id, environment_name, logger)")
-        out.append("                except Exception:")
-        out.append("                    pass")
-        out.append("        # --- END PRE-FILL ---")
-        inserted = True
-
-TARGET.write_text("\n".join(out), encoding="utf-8")
-
-if not inserted:
+# Insert just BEFORE conditional InternalInputUserInput evaluation
+anchor = "if type(config) is InternalInputUserInput:"
+idx = text.find(anchor)
+if idx == -1:
     print("⚠️ Warning: insertion point not found (code may have changed)")
-else:
-    print("✅ Pre-fill fix applied successfully")
-
+    sys.exit(0)
+
+line_start = text.rfind("\n", 0, idx) + 1
+indent = text[line_start:idx]
+injection = f"""{indent}# --- PRE-FILL config values from lean_config before conditional evaluation ---
+{indent}for _cfg in self._lean_configs:
+{indent}    if _cfg._value is None:
+{indent}        try:
+{indent}            _cfg._value = self.get_default(lean_config, _cfg._id, environment_name, logger)
+{indent}        except Exception:
+{indent}            pass
+{indent}# --- END PRE-FILL ---
+
+"""
+
+# write to a sibling temp file and swap it in atomically, so a crash never leaves a half-written file
+tmp = TARGET.with_suffix(".py.tmp")
+tmp.write_text(text[:line_start] + injection + text[line_start:], encoding="utf-8")
+os.replace(tmp, TARGET)
+print("✅ Pre-fill fix applied successfully")
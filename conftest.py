@@ -0,0 +1,14 @@
+# conftest.py
+# Shared fixtures of the check scripts in the repository root, the test suite lives in tests/.
+import pytest
+
+
+@pytest.fixture
+def json_module():
+    """Provides lean.models.json_module to a check script.
+
+    Function scoped so no check can hand state to the next one through the fixture, the import itself is
+    resolved from sys.modules after the first use.
+    """
+    import lean.models.json_module as json_module
+    return json_module
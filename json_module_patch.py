@@ -1,20 +1,20 @@
 from pathlib import Path
+import os, re
+
+# Wir ersetzen den Block ab 'is_empty = ...' bis zur Zeile 'configuration._value = user_choice'
+_IS_EMPTY_BLOCK_RE = re.compile(
+    r"is_empty\s*=\s*user_choice\s+is\s+None\s+or\s+\(isinstance\(user_choice,\s*str\)\s+and\s+user_choice\.strip\(\)\s*==\s*\"\"\)\s*\n\n\s*if\s+is_empty:.*?\n\s*configuration\._value\s*=\s*user_choice",
+    re.DOTALL
+)
+
 p = Path("lean/models/json_module.py")
 s = p.read_text(encoding="utf-8")
 
 old_marker = "is_empty = user_choice is None or (isinstance(user_choice, str) and user_choice.strip() == \"\")"
-if old_marker not in s:
+if old_marker not in s or "configuration._value = user_choice" not in s:
     print("❗ Unerwarteter Datei-Inhalt — 'is_empty' Marker nicht gefunden. Abort.")
     raise SystemExit(1)
 
-# Wir ersetzen den Block ab 'is_empty = ...' bis zur Zeile 'configuration._value = user_choice'
-import re
-
-pattern = re.compile(
-    r"is_empty\s*=\s*user_choice\s+is\s+None\s+or\s+\(isinstance\(user_choice,\s*str\)\s+and\s+user_choice\.strip\(\)\s*==\s*\"\"\)\s*\n\n\s*if\s+is_empty:.*?\n\s*configuration\._value\s*=\s*user_choice",
-    re.DOTALL
-)
-
 replacement = r"""# Leer-/None-Check: Empty string gilt nicht automatisch als "fehlend",
         # wenn der Key explizit in der lean.json environment properties vorhanden ist.
         is_empty = user_choice is None or (isinstance(user_choice, str) and user_choice.strip() == "")
@@ -57,12 +57,15 @@ replacement = r"""# Leer-/None-Check: Empty string gilt nicht automatisch als "f
 
         configuration._value = user_choice"""
 
-new = pattern.sub(replacement, s, count=1)
+new = _IS_EMPTY_BLOCK_RE.sub(replacement, s, count=1)
 if new == s:
     print("❗ Ersetzung fehlgeschlagen: Pattern nicht gefunden / nicht ersetzt.")
     raise SystemExit(1)
 
-p.write_text(new, encoding="utf-8")
+# write to a sibling temp file and swap it in atomically, so a crash never leaves a half-written file
+tmp = p.with_suffix(".py.tmp")
+tmp.write_text(new, encoding="utf-8")
+os.replace(tmp, p)
 print("✅ Patch angewendet: lean/models/json_module.py wurde aktualisiert.")
 # show small diff-ish context
 print("---- Kontext nach Änderung (lines around replacement):")
@@ -11,12 +11,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from json import loads
+from re import compile
 from typing import Any, Dict, List
 
 from lean.components.util.logger import Logger
 from lean.models.json_module import JsonModule
 from lean.models.logger import Option
 
+# keys that are expected to hold list-like values and should be merged by _update_settings
+_LIST_LIKE_KEYS = frozenset(
+    {
+        "data-queue-handler",
+        # add additional list-like keys here if needed
+    }
+)
+
+# separator of comma-separated list-like property values, surrounding whitespace included
+_CSV_RE = compile(r"\s*,\s*")
+
 
 def build_and_configure_modules(
     target_modules: List[str],
@@ -39,6 +52,10 @@ def build_and_configure_modules(
     :param environment_name: the environment name to use
     :param module_version: The version of the module to install. If not provided, the latest version will be installed.
     """
+    if not target_modules:
+        return
+
+    env_block = lean_config.setdefault("environments", {}).setdefault(environment_name, {})
     for target_module_name in target_modules:
         module = non_interactive_config_build_for_name(
             lean_config,
@@ -50,7 +67,7 @@ def build_and_configure_modules(
         )
         # Ensures extra modules (not brokerage or data feeds) are installed.
         module.ensure_module_installed(organization_id, module_version)
-        lean_config["environments"][environment_name].update(module.get_settings())
+        env_block.update(module.get_settings())
 
 
 def non_interactive_config_build_for_name(
@@ -79,39 +96,31 @@ def find_module(
     # because we compare str we normalize everything to lower case
     target_module_name = target_module_name.lower()
     module_class_name = target_module_name.rfind(".")
+    suffix = (
+        target_module_name[module_class_name + 1 :] if module_class_name != -1 else None
+    )
     for module in module_list:
-        # we search in the modules name and id
-        module_id = module.get_id().lower()
-        module_name = module.get_name().lower()
-
-        if module_id == target_module_name or module_name == target_module_name:
+        # we search in the modules name and id, the first module in the list matching either the full name
+        # or the class name wins
+        module_keys = (module.get_id().lower(), module.get_name().lower())
+        if target_module_name in module_keys or suffix in module_keys:
             target_module = module
             break
-        else:
-            if (
-                module_class_name != -1
-                and module_id == target_module_name[module_class_name + 1 :]
-                or module_name == target_module_name[module_class_name + 1 :]
-            ):
-                target_module = module
-                break
 
     if not target_module:
         for module in module_list:
             # we search in the modules configuration values, this is for when the user provides an environment
-            if (
-                module.is_value_in_config(target_module_name)
-                or module_class_name != -1
-                and module.is_value_in_config(
-                    target_module_name[module_class_name + 1 :]
-                )
+            if module.is_value_in_config(target_module_name) or (
+                suffix is not None and module.is_value_in_config(suffix)
             ):
                 target_module = module
+                break
         if not target_module:
             raise RuntimeError(
                 f"""Failed to resolve module for name: '{target_module_name}'"""
             )
-    logger.debug(f"Found module '{target_module_name}' from given name")
+    if getattr(logger, "debug_logging_enabled", True):
+        logger.debug(f"Found module '{target_module_name}' from given name")
     return target_module
 
 
@@ -193,9 +202,6 @@ def _update_settings(logger, environment_name: str, target: dict, lean_config: d
       - Support Python lists, JSON arrays, comma-separated lists and single scalar strings.
       - Merge list-like keys preserving order and uniqueness.
     """
-    import json
-    from json import loads
-
     # helper to get property value from lean_config/environment
     def _get_env_properties():
         try:
@@ -210,92 +216,101 @@ def _update_settings(logger, environment_name: str, target: dict, lean_config: d
             return {}
 
     env_props = _get_env_properties()
+    if not env_props:
+        return
 
-    # keys that are expected to hold list-like values and should be merged
-    list_like_keys = [
-        "data-queue-handler",
-        # add additional list-like keys here if needed
+    # only build the debug messages when they will be printed
+    debug_logging_enabled = getattr(logger, "debug_logging_enabled", True)
+
+    # list-like keys already present in the target are merged, everything else is assigned as-is
+    merge_keys = [
+        key
+        for key in _LIST_LIKE_KEYS & env_props.keys()
+        if key in target and env_props[key] is not None
     ]
+    assigned = {
+        key: value
+        for key, value in env_props.items()
+        if value is not None and key not in merge_keys
+    }
+    if debug_logging_enabled:
+        for key, value in env_props.items():
+            if value is None:
+                logger.debug(f"_update_settings: skipping {key}=None")
+            elif key in assigned:
+                action = "overwritten" if key in target else "assigned"
+                logger.debug(f"_update_settings: {action} {key} -> {value!r}")
+    if assigned:
+        target.update(assigned)
 
-    for key, value in env_props.items():
-        # skip explicit None Python value
-        if value is None:
-            logger.debug(f"_update_settings: skipping {key}=None")
-            continue
+    for key in merge_keys:
+        value = env_props[key]
+        parsed_value = _LIST_PARSERS.get(type(value), _as_list)(value)
+        if debug_logging_enabled:
+            logger.debug(f"_update_settings: parsed {key} -> {parsed_value!r}")
 
-        # If the key is not present in target, set it directly
-        if key not in target:
-            target[key] = value
-            logger.debug(f"_update_settings: assigned {key} -> {value!r}")
+        # nothing to merge, keep the current setting untouched
+        if not parsed_value:
+            if debug_logging_enabled:
+                logger.debug(f"_update_settings: nothing to merge for {key}")
             continue
 
-        # If the setting is expected to be list-like, try to merge
-        if key in list_like_keys:
-            parsed_value = None
-
-            # already-Python list/tuple -> use as-is
-            if isinstance(value, (list, tuple)):
-                parsed_value = list(value)
-                logger.debug(
-                    f"_update_settings: property {key} is Python list/tuple -> {parsed_value!r}"
-                )
-            else:
-                # treat empty-ish strings as empty list
-                if isinstance(value, str) and value.strip() in ("", "None", "null"):
-                    parsed_value = []
-                    logger.debug(
-                        f"_update_settings: property {key} contains explicit empty-ish value -> treat as []"
-                    )
-                else:
-                    # attempt JSON parse for strings
-                    if isinstance(value, str):
-                        try:
-                            parsed_value = loads(value)
-                            # coerce non-list JSON (e.g. "A") into list
-                            if not isinstance(parsed_value, list):
-                                parsed_value = [parsed_value]
-                            logger.debug(
-                                f"_update_settings: parsed JSON for {key} -> {parsed_value!r}"
-                            )
-                        except Exception:
-                            # fallback: comma-separated values
-                            if "," in value:
-                                parsed_value = [
-                                    v.strip() for v in value.split(",") if v.strip()
-                                ]
-                                logger.debug(
-                                    f"_update_settings: fallback CSV-split for {key} -> {parsed_value!r}"
-                                )
-                            else:
-                                # single non-json scalar string -> coerce to list
-                                parsed_value = [value]
-                                logger.debug(
-                                    f"_update_settings: coerced non-json scalar for {key} -> {parsed_value!r}"
-                                )
-                    else:
-                        # unknown non-string/non-list value: try to coerce into list
-                        try:
-                            parsed_value = list(value)
-                            logger.debug(
-                                f"_update_settings: coerced iterable for {key} -> {parsed_value!r}"
-                            )
-                        except Exception:
-                            parsed_value = [value]
-                            logger.debug(
-                                f"_update_settings: coerced fallback for {key} -> {parsed_value!r}"
-                            )
-
-            # ensure parsed_value is a list
-            if parsed_value is None:
-                parsed_value = []
-
-            existing = list(target.get(key) or [])
-            # preserve order, unique
-            merged = list(dict.fromkeys(existing + parsed_value).keys())
-            target[key] = merged
+        # preserve order, unique
+        seen = set()
+        merged = []
+        for values in (target.get(key) or (), parsed_value):
+            for item in values:
+                if item not in seen:
+                    seen.add(item)
+                    merged.append(item)
+        target[key] = merged
+        if debug_logging_enabled:
             logger.debug(f"_update_settings: merged {key} -> {merged!r}")
-            continue
 
-        # Non-list-like keys: overwrite with environment property
-        target[key] = value
-        logger.debug(f"_update_settings: overwritten {key} -> {value!r}")
+
+def _parse_str(value: str) -> List[Any]:
+    """Parses a list-like property given as a string
+
+    Empty-ish strings ("", "None" and "null") give an empty list, JSON documents are decoded,
+    comma-separated strings are split and any other string is a single value.
+
+    :param value: the property value
+    :return: the values the property holds
+    """
+    value = value.strip()
+    if value in ("", "None", "null"):
+        return []
+    # only arrays, objects and strings can contain the characters a plain scalar can't,
+    # so nothing else is worth a JSON parse attempt
+    if value[:1] in ("[", "{", '"'):
+        try:
+            parsed_value = loads(value)
+        except ValueError:
+            pass
+        else:
+            return parsed_value if isinstance(parsed_value, list) else [parsed_value]
+    if "," in value:
+        return [v for v in _CSV_RE.split(value) if v]
+    return [value]
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Coerces a list-like property that isn't a list, tuple or string into a list
+
+    :param value: the property value
+    :return: the items of the value if it is iterable, otherwise the value itself
+    """
+    if isinstance(value, str):
+        return _parse_str(value)
+    try:
+        return list(value)
+    except TypeError:
+        return [value]
+
+
+# parsers of list-like property values, keyed by the exact type of the value, _as_list handles the rest
+_LIST_PARSERS = {
+    list: list,
+    tuple: list,
+    str: _parse_str,
+}
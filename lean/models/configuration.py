@@ -12,11 +12,13 @@
 # limitations under the License.
 
 from pathlib import Path
+from sys import intern
 from typing import Any, Dict, List
 from click import prompt, Choice
 from abc import ABC, abstractmethod
 from lean.components.util.logger import Logger
 from lean.click import PathParameter
+from lean.constants import MODULE_PLATFORM, MODULE_TYPE
 
 
 class BaseCondition(ABC):
@@ -25,7 +27,7 @@ class BaseCondition(ABC):
     def __init__(self, condition_object: Dict[str, str]):
         self._type: str = condition_object["type"]
         self._pattern: str = str(condition_object["pattern"])
-        self._dependent_config_id: str = condition_object["dependent-config-id"]
+        self._dependent_config_id: str = intern(condition_object["dependent-config-id"])
 
     def factory(condition_object: Dict[str, str]) -> 'BaseCondition':
         """Creates an instance of the child classes.
@@ -89,8 +91,14 @@ class ConditionalValueOption():
 class Configuration(ABC):
     """Base configuration class extended to all types of configurations"""
 
+    # type flags overridden by the subclasses, read instead of isinstance checks in the hot loops
+    _is_brokerage_env: bool = False
+    _is_auth: bool = False
+    _is_path_param: bool = False
+
     def __init__(self, config_json_object):
-        self._id: str = config_json_object["id"]
+        # ids are looked up in dicts over and over, interned strings compare by identity
+        self._id: str = intern(config_json_object["id"])
         self._config_type: str = config_json_object["type"]
         self._value: str = config_json_object["value"] if "value" in config_json_object else ""
         self._is_required_from_user = False
@@ -101,7 +109,7 @@ class Configuration(ABC):
             self._log_message = config_json_object["log-message"]
         if "filters" in config_json_object.keys():
             self._filter = Filter(config_json_object["filters"])
-            self.has_filter_dependency = Filter.has_conditions
+            self.has_filter_dependency = self._filter.has_conditions
         else:
             self._filter = Filter([])
         self._input_default = config_json_object["input-default"] if "input-default" in config_json_object else None
@@ -115,17 +123,11 @@ class Configuration(ABC):
         :return: An instance of Configuration.
         """
 
-        if config_json_object["type"] in ["info"]:
-            return InfoConfiguration.factory(config_json_object)
-        elif config_json_object["type"] in ["input", "internal-input"]:
-            return UserInputConfiguration.factory(config_json_object)
-        elif config_json_object["type"] == "filter-env":
-            return BrokerageEnvConfiguration.factory(config_json_object)
-        elif config_json_object["type"] == "oauth-token":
-            return AuthConfiguration.factory(config_json_object)
-        else:
+        configuration_factory = _CONFIGURATION_FACTORIES.get(config_json_object["type"])
+        if configuration_factory is None:
             raise ValueError(
                 f'Undefined input method type {config_json_object["type"]}')
+        return configuration_factory(config_json_object)
 
     def __repr__(self):
         return f'{self._id}: {self._value}'
@@ -138,6 +140,10 @@ class Filter:
     def __init__(self, filter_conditions):
         self._conditions: List[BaseCondition] = [BaseCondition.factory(
             condition["condition"]) for condition in filter_conditions]
+        # module type and platform conditions are the cheapest to evaluate, check them before the
+        # conditions depending on other configurations
+        self._conditions.sort(key=lambda condition: condition._dependent_config_id not in (MODULE_TYPE,
+                                                                                            MODULE_PLATFORM))
 
     @property
     def has_conditions(self) -> bool:
@@ -209,16 +215,9 @@ class UserInputConfiguration(Configuration, ABC):
         # NOTE: Check "Type" before "Input-method"
         if config_json_object["type"] == "internal-input":
             return InternalInputUserInput(config_json_object)
-        if config_json_object["input-method"] == "prompt":
-            return PromptUserInput(config_json_object)
-        elif config_json_object["input-method"] == "choice":
-            return ChoiceUserInput(config_json_object)
-        elif config_json_object["input-method"] == "confirm":
-            return ConfirmUserInput(config_json_object)
-        elif config_json_object["input-method"] == "prompt-password":
-            return PromptPasswordUserInput(config_json_object)
-        elif config_json_object["input-method"] == "path-parameter":
-            return PathParameterUserInput(config_json_object)
+        input_class = _USER_INPUT_FACTORIES.get(config_json_object["input-method"])
+        if input_class is not None:
+            return input_class(config_json_object)
 
 
 class InternalInputUserInput(UserInputConfiguration):
@@ -299,6 +298,8 @@ class ChoiceUserInput(UserInputConfiguration):
 
 
 class PathParameterUserInput(UserInputConfiguration):
+    _is_path_param = True
+
     def __init__(self, config_json_object):
         super().__init__(config_json_object)
 
@@ -362,6 +363,8 @@ class PromptPasswordUserInput(UserInputConfiguration):
 class BrokerageEnvConfiguration(PromptUserInput, ChoiceUserInput, ConfirmUserInput):
     """This class is base class extended by all classes that needs to add value to user filters"""
 
+    _is_brokerage_env = True
+
     def __init__(self, config_json_object):
         super().__init__(config_json_object)
 
@@ -397,6 +400,7 @@ class BrokerageEnvConfiguration(PromptUserInput, ChoiceUserInput, ConfirmUserInp
 
 
 class AuthConfiguration(InternalInputUserInput):
+    _is_auth = True
 
     def __init__(self, config_json_object):
         super().__init__(config_json_object)
@@ -431,3 +435,21 @@ class FilterEnvConfiguration(BrokerageEnvConfiguration):
 
     def __init__(self, config_json_object):
         super().__init__(config_json_object)
+
+
+# dispatch tables of the factories, by configuration type and by input method
+_USER_INPUT_FACTORIES = {
+    "prompt": PromptUserInput,
+    "choice": ChoiceUserInput,
+    "confirm": ConfirmUserInput,
+    "prompt-password": PromptPasswordUserInput,
+    "path-parameter": PathParameterUserInput,
+}
+
+_CONFIGURATION_FACTORIES = {
+    "info": InfoConfiguration.factory,
+    "input": UserInputConfiguration.factory,
+    "internal-input": UserInputConfiguration.factory,
+    "filter-env": BrokerageEnvConfiguration.factory,
+    "oauth-token": AuthConfiguration.factory,
+}
@@ -12,11 +12,12 @@
 # limitations under the License.
 
 from abc import ABC
-from copy import copy
 from enum import Enum
-from typing import Any, Dict, List, Type
+from re import compile
+from sys import intern
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Type
 
-from click import get_current_context
+from click import prompt
 from click.core import ParameterSource
 
 from lean.components.util.auth0_helper import get_authorization
@@ -34,10 +35,37 @@ from lean.models.configuration import (
 
 _logged_messages = set()
 
+# escaped newlines become newlines, any other backslash becomes a forward slash
+_ESCAPE_RE = compile(r"\\n|\\")
+
+
+def _unescape_match(match) -> str:
+    return "\n" if match.group(0) == "\\n" else "/"
+
 
 class JsonModule(ABC):
     """The JsonModule class is the base class extended for all json modules."""
 
+    __slots__ = (
+        "_module_type",
+        "_platform",
+        "_product_id",
+        "_id",
+        "_display_name",
+        "_specifications_url",
+        "_installs",
+        "_configs",
+        "_configs_by_id",
+        "_key_pairs",
+        "_build_order",
+        "_conditional_internal_configs",
+        "_path_configs",
+        "_is_module_installed",
+        "_initial_cash_balance",
+        "_initial_holdings",
+        "_minimum_seat",
+    )
+
     def __init__(
         self, json_module_data: Dict[str, Any], module_type: str, platform: str
     ) -> None:
@@ -46,7 +74,7 @@ class JsonModule(ABC):
         self._product_id: int = (
             json_module_data["product-id"] if "product-id" in json_module_data else 0
         )
-        self._id: str = json_module_data["id"]
+        self._id: str = intern(json_module_data["id"])
         self._display_name: str = json_module_data["display-id"]
         self._specifications_url: str = (
             json_module_data["specifications"]
@@ -58,9 +86,10 @@ class JsonModule(ABC):
             if ("installs" in json_module_data and platform == MODULE_CLI_PLATFORM)
             else False
         )
-        self._lean_configs: List[Configuration] = []
-        for config in json_module_data["configurations"]:
-            self._lean_configs.append(Configuration.factory(config))
+        self._lean_configs = [
+            Configuration.factory(config)
+            for config in json_module_data["configurations"]
+        ]
         self._lean_configs = self.sort_configs()
         self._is_module_installed: bool = False
         self._initial_cash_balance: LiveInitialStateInput = (
@@ -79,22 +108,83 @@ class JsonModule(ABC):
             else None
         )
 
+    @property
+    def _lean_configs(self) -> List[Configuration]:
+        return self._configs
+
+    @_lean_configs.setter
+    def _lean_configs(self, configs: List[Configuration]) -> None:
+        self._configs: List[Configuration] = configs
+        self._invalidate_index()
+
+    def _invalidate_index(self) -> None:
+        """Rebuilds the id lookup of the configurations, call it after mutating _lean_configs in place."""
+        self._configs_by_id: Dict[str, Configuration] = {
+            config._id: config for config in self._configs
+        }
+        # (lean key, python variable) name pairs, aligned with _lean_configs
+        self._key_pairs: List[Tuple[str, str]] = [
+            (config._id, intern(self.convert_lean_key_to_variable(config._id)))
+            for config in self._configs
+        ]
+        # internal inputs whose value is picked from their value options by get_settings
+        self._conditional_internal_configs: List[InternalInputUserInput] = [
+            config
+            for config in self._configs
+            if type(config) is InternalInputUserInput and config._is_conditional
+        ]
+        self._path_configs: List[PathParameterUserInput] = [
+            config for config in self._configs if config._is_path_param
+        ]
+        self._build_order: List[Tuple[Configuration, Tuple[str, str]]] = [
+            (self._configs[i], self._key_pairs[i]) for i in self._topological_order()
+        ]
+
+    def _topological_order(self) -> List[int]:
+        """Returns the indices of the configurations, each after the configurations its filters depend on.
+
+        The current order is kept where there are no dependencies, and entirely when the dependencies form a cycle.
+        """
+        positions = {config._id: i for i, config in enumerate(self._configs)}
+        dependencies = [
+            [
+                positions[condition._dependent_config_id]
+                for condition in config._filter._conditions
+                if condition._dependent_config_id in positions
+            ]
+            for config in self._configs
+        ]
+        order: List[int] = []
+        # 1 while visiting the dependencies of a configuration, 2 once it is in the order
+        state = [0] * len(self._configs)
+
+        def visit(i: int) -> bool:
+            if state[i] == 2:
+                return True
+            if state[i] == 1:
+                return False
+            state[i] = 1
+            if not all(visit(dependency) for dependency in dependencies[i]):
+                return False
+            state[i] = 2
+            order.append(i)
+            return True
+
+        if not all(visit(i) for i in range(len(self._configs))):
+            return list(range(len(self._configs)))
+        return order
+
     def get_id(self):
         return self._id
 
     def sort_configs(self) -> List[Configuration]:
-        sorted_configs = []
-        filter_configs = []
-        brokerage_configs = []
-        for config in self._lean_configs:
-            if isinstance(config, BrokerageEnvConfiguration):
-                brokerage_configs.append(config)
-            else:
-                if config.has_filter_dependency:
-                    filter_configs.append(config)
-                else:
-                    sorted_configs.append(config)
-        return brokerage_configs + sorted_configs + filter_configs
+        """Orders brokerage environment configurations first and configurations with filters last."""
+        return sorted(
+            self._lean_configs,
+            key=lambda config: 0
+            if config._is_brokerage_env
+            else (2 if config.has_filter_dependency else 1),
+        )
 
     def get_name(self) -> str:
         """Returns the user-friendly name which users can identify this object by.
@@ -104,186 +194,178 @@ class JsonModule(ABC):
         return self._display_name
 
     def _check_if_config_passes_filters(
+        self,
+        config: Configuration,
+        all_for_platform_type: bool,
+        cache: Dict[Tuple[int, bool], bool] = None,
+    ) -> bool:
+        """Checks the filter conditions of a configuration.
+
+        :param cache: optional memo of results, valid for as long as no configuration value changes
+        """
+        if cache is None:
+            return self._evaluate_filters(config, all_for_platform_type)
+        key = (id(config), all_for_platform_type)
+        if key not in cache:
+            cache[key] = self._evaluate_filters(config, all_for_platform_type)
+        return cache[key]
+
+    def _evaluate_filters(
         self, config: Configuration, all_for_platform_type: bool
     ) -> bool:
+        # the module type and platform conditions come first, see Filter
         for condition in config._filter._conditions:
-            if condition._dependent_config_id == MODULE_TYPE:
+            dependent_config_id = condition._dependent_config_id
+            if dependent_config_id == MODULE_TYPE:
                 target_value = self._module_type
-            elif condition._dependent_config_id == MODULE_PLATFORM:
+            elif dependent_config_id == MODULE_PLATFORM:
                 target_value = self._platform
             else:
                 if all_for_platform_type:
                     # skip, we want all configurations that match type and platform, for help
-                    continue
-                target_value = self.get_config_value_from_name(
-                    condition._dependent_config_id
-                )
+                    break
+                dependency = self._configs_by_id.get(dependent_config_id)
+                target_value = dependency._value if dependency is not None else None
             if not target_value:
                 return False
             elif isinstance(target_value, dict):
-                return all(condition.check(value) for value in target_value.values())
+                if not all(condition.check(value) for value in target_value.values()):
+                    return False
             elif not condition.check(target_value):
                 return False
         return True
 
     def get_config_value_from_name(self, target_name: str) -> str:
-        [idx] = [
-            i
-            for i in range(len(self._lean_configs))
-            if self._lean_configs[i]._id == target_name
-        ]
-        return self._lean_configs[idx]._value
+        return self._configs_by_id[target_name]._value
 
     def is_value_in_config(self, searched_value: str) -> bool:
         searched_value = searched_value.lower()
-        for i in range(len(self._lean_configs)):
-            value = self._lean_configs[i]._value
+        for config in self._lean_configs:
+            value = config._value
             if isinstance(value, str):
-                value = value.lower()
-            if isinstance(value, list):
-                value = [x.lower() for x in value]
-
-            if searched_value in value:
-                return True
+                if searched_value in value.lower():
+                    return True
+            elif isinstance(value, list):
+                if any(searched_value == item.lower() for item in value):
+                    return True
         return False
 
-    def get_settings(self) -> Dict[str, str]:
+    def get_settings(
+        self,
+        lean_config: Dict[str, Any] = None,
+        environment_name: str = None,
+        logger: Logger = None,
+    ) -> Dict[str, str]:
         """
         Build and return settings for this module.
 
         Robust behavior:
-        - Prefill conditional InternalInputUserInput values using any available lean_config /
-        environment_name / logger from the caller via globals() if present (best-effort).
         - If a conditional can't match any option, WARN and treat it as an explicit empty value
         (do NOT raise), so non-interactive flows continue.
         - Preserve previous behavior of converting values to strings and replacing escaped newlines
         and backslashes.
+
+        :param lean_config: the lean config to prefill configs without a value from, config_build already does so
+        :param environment_name: the environment whose properties take precedence over the lean config
+        :param logger: the logger to warn on, the container logger if omitted
         """
+        if logger is None:
+            logger = container.logger
+        if lean_config is not None:
+            defaults = self._build_default_lookup(lean_config, environment_name)
+            for config in self._lean_configs:
+                if config._value is None:
+                    config._value = self.get_default(
+                        lean_config, config._id, environment_name, logger, defaults
+                    )
+
         settings: Dict[str, str] = {"id": self._id}
 
-        # Try to obtain context used by previous code paths (best-effort).
-        lean_config = globals().get("lean_config", None)
-        environment_name = globals().get("environment_name", None)
-        logger = globals().get("logger", None)
-
-        # --- PREFILL FOR INTERNAL CONDITIONALS (best-effort) ---
-        # If we have a lean_config and/or environment context, try to prefill _value for
-        # InternalInputUserInput entries so option condition checks work reliably.
-        try:
-            for _cfg in self._lean_configs:
-                if getattr(_cfg, "_value", None) is None:
-                    try:
-                        # Use self.get_default if available, otherwise leave as None.
-                        if lean_config is not None and logger is not None:
-                            _cfg._value = self.get_default(
-                                lean_config, _cfg._id, environment_name, logger
-                            )
-                    except Exception:
-                        # Prefill best-effort: ignore failures.
-                        pass
-        except Exception:
-            # Never fail here — prefill is a convenience.
-            pass
-        # --- END PREFILL ---
-
-        # Now evaluate conditional InternalInputUserInput items. If no condition matches,
-        # treat as explicit empty (log a warning) to allow non-interactive usage.
-        for config in self._lean_configs:
-            if type(config) is InternalInputUserInput and getattr(
-                config, "_is_conditional", False
-            ):
-                try:
-                    matched = False
-                    for option in getattr(config, "_value_options", []):
-                        dep_id = option._condition._dependent_config_id
-                        try:
-                            target_value = self.get_config_value_from_name(dep_id)
-                        except Exception:
-                            # If we couldn't look up the dependent config, try to use prefills or None
-                            target_value = getattr(
-                                next(
-                                    (c for c in self._lean_configs if c._id == dep_id),
-                                    None,
-                                ),
-                                "_value",
-                                None,
-                            )
-                        if option._condition.check(target_value):
-                            config._value = option._value
-                            matched = True
-                            break
-                    if not matched:
-                        # Instead of raising (which breaks non-interactive workflows), warn and treat
-                        # the config as explicitly empty so downstream code can handle it.
-                        if logger is not None and hasattr(logger, "warning"):
-                            logger.warning(
-                                f'No condition matched among present options for "{config._id}". '
-                                "Treating as explicitly empty to allow non-interactive execution."
-                            )
-                        else:
-                            # fallback to print if no logger available
-                            print(
-                                f'WARNING: No condition matched among present options for "{config._id}". '
-                                "Treating as explicitly empty to allow non-interactive execution."
-                            )
-                        config._value = "" if config._value is None else config._value
-                except Exception:
-                    # Never allow a conditional evaluation exception to bubble out of get_settings.
-                    if logger is not None and hasattr(logger, "warning"):
-                        logger.warning(
-                            f'Error while evaluating conditional config "{config._id}". Treating as empty.'
-                        )
+        # Now evaluate conditional InternalInputUserInput items, config_build or the prefill above has
+        # already filled the values from the lean config. If no condition matches, treat as explicit empty
+        # (log a warning) to allow non-interactive usage.
+        # The options of a config usually depend on the same config, look each dependency up once.
+        dependent_values: Dict[str, Any] = {}
+        for config in self._conditional_internal_configs:
+            try:
+                matched = False
+                for option in config._value_options:
+                    dep_id = option._condition._dependent_config_id
+                    if dep_id in dependent_values:
+                        target_value = dependent_values[dep_id]
                     else:
-                        print(
-                            f'WARNING: Error while evaluating conditional config "{config._id}".'
+                        dependency = self._configs_by_id.get(dep_id)
+                        target_value = (
+                            dependency._value if dependency is not None else None
                         )
+                        dependent_values[dep_id] = target_value
+                    if target_value is not None and option._condition.check(
+                        target_value
+                    ):
+                        config._value = option._value
+                        matched = True
+                        break
+                if not matched:
+                    # Instead of raising (which breaks non-interactive workflows), warn and treat
+                    # the config as explicitly empty so downstream code can handle it.
+                    logger.warn(
+                        f'No condition matched among present options for "{config._id}". '
+                        "Treating as explicitly empty to allow non-interactive execution."
+                    )
+                    config._value = "" if config._value is None else config._value
+                # later conditionals may depend on this config
+                dependent_values.pop(config._id, None)
+            except Exception:
+                # Conditions expect string values, never let a value of another type bubble out of get_settings.
+                logger.warn(
+                    f'Error while evaluating conditional config "{config._id}". Treating as empty.'
+                )
 
         # Build settings dict (respecting filters)
+        filter_cache: Dict[Tuple[int, bool], bool] = {}
         for configuration in self._lean_configs:
-            try:
-                if not self._check_if_config_passes_filters(
-                    configuration, all_for_platform_type=False
-                ):
-                    continue
-                if isinstance(configuration, AuthConfiguration) and isinstance(
-                    configuration._value, dict
-                ):
-                    for key, value in configuration._value.items():
-                        settings[key] = str(value)
-                else:
-                    # Convert to string, unescape newline escapes and normalize backslashes.
-                    settings[configuration._id] = (
-                        (
-                            ""
-                            if configuration._value is None
-                            else str(configuration._value)
-                        )
-                        .replace("\\n", "\n")
-                        .replace("\\", "/")
-                    )
-            except Exception:
-                # Skip problematic configuration entries but log if possible.
-                if logger is not None and hasattr(logger, "warning"):
-                    logger.warning(
-                        f"Skipping config '{getattr(configuration, '_id', '<unknown>')}' due to error."
-                    )
-                else:
-                    print(
-                        f"WARNING: Skipping config '{getattr(configuration, '_id', '<unknown>')}' due to error."
-                    )
+            if not self._check_if_config_passes_filters(
+                configuration, all_for_platform_type=False, cache=filter_cache
+            ):
+                continue
+            if configuration._is_auth and isinstance(
+                configuration._value, dict
+            ):
+                for key, value in configuration._value.items():
+                    settings[key] = str(value)
+            else:
+                # Convert to string, unescape newline escapes and normalize backslashes.
+                value = (
+                    ""
+                    if configuration._value is None
+                    else str(configuration._value)
+                )
+                if "\\" in value:
+                    value = _ESCAPE_RE.sub(_unescape_match, value)
+                settings[configuration._id] = value
 
         return settings
 
     def get_all_input_configs(
-        self, filters: List[Type[Configuration]] = []
-    ) -> List[Configuration]:
-        return [
-            copy(config)
-            for config in self._lean_configs
-            if config._is_required_from_user
-            if not isinstance(config, tuple(filters))
-            and self._check_if_config_passes_filters(config, all_for_platform_type=True)
-        ]
+        self, filters: Iterable[Type[Configuration]] = ()
+    ) -> Iterator[Configuration]:
+        """Yields the configurations required from the user, for the module's type and platform.
+
+        The configurations are the module's own objects, not copies.
+
+        :param filters: configuration types to leave out
+        """
+        excluded_types = tuple(filters)
+        filter_cache: Dict[Tuple[int, bool], bool] = {}
+        for config in self._lean_configs:
+            if (
+                config._is_required_from_user
+                and not isinstance(config, excluded_types)
+                and self._check_if_config_passes_filters(
+                    config, all_for_platform_type=True, cache=filter_cache
+                )
+            ):
+                yield config
 
     def convert_lean_key_to_variable(self, lean_key: str) -> str:
         """Replaces hyphens with underscore to follow python naming convention.
@@ -306,8 +388,6 @@ class JsonModule(ABC):
         :param require_project_id: Flag to determine if prompting is necessary.
         :return: A valid project ID.
         """
-        from click import prompt
-
         project_id: int = default_project_id
         if require_project_id and project_id <= 0:
             project_id = prompt(
@@ -337,93 +417,60 @@ class JsonModule(ABC):
         - Prefills InternalInputUserInput values before evaluating conditional options.
         - Avoids uninitialized user_choice.
         """
-        from click import get_current_context
-
-        # Normalize inputs
-        user_provided_options = dict(user_provided_options or {})
-        properties = dict(properties or {})
-
-        # Helper: return a map that contains both dash and underscore variants for every key
-        def _normalized_options_map(opts: Dict[str, Any]) -> Dict[str, Any]:
-            out: Dict[str, Any] = {}
-            for k, v in opts.items():
-                out[k] = v
-                if "-" in k:
-                    out[k.replace("-", "_")] = v
-                if "_" in k:
-                    out[k.replace("_", "-")] = v
-            return out
-
-        user_provided_options = _normalized_options_map(user_provided_options)
-        properties = _normalized_options_map(properties)
+        # Resolve the provided values once, keyed by python variable name. User options with a value win over
+        # properties, within each the python variable form wins over the lean key form. Presence in either of
+        # them, even without a value, counts as explicitly provided.
+        resolved: Dict[str, Tuple[Any, str, bool]] = {}
+        explicitly_provided = set()
+        for options, from_user in ((properties, False), (user_provided_options, True)):
+            for lean_form in (True, False):
+                for key, value in (options or {}).items():
+                    if ("-" in key) is not lean_form:
+                        continue
+                    variable = self.convert_lean_key_to_variable(key)
+                    explicitly_provided.add(variable)
+                    if not from_user or value is not None:
+                        resolved[variable] = (value, key, from_user)
 
         missing_options: List[str] = []
+        # only build the debug messages when they will be printed
+        debug_logging_enabled = getattr(logger, "debug_logging_enabled", True)
 
         # Prefill InternalInputUserInput config values from lean_config so condition checks are reliable
-        try:
-            for _cfg in self._lean_configs:
-                if getattr(_cfg, "_value", None) is None:
-                    try:
-                        _cfg._value = self.get_default(
-                            lean_config, _cfg._id, environment_name, logger
-                        )
-                    except Exception:
-                        pass
-        except Exception:
-            # defensive: do not fail if prefill errors
-            pass
+        defaults = self._build_default_lookup(lean_config, environment_name)
+        for _cfg in self._lean_configs:
+            if _cfg._value is None:
+                _cfg._value = self.get_default(
+                    lean_config, _cfg._id, environment_name, logger, defaults
+                )
 
-        for configuration in self._lean_configs:
+        # configurations come after the ones their filters depend on, so every filter is checked
+        # once against final values
+        for configuration, (lean_key, var_key) in self._build_order:
             # skip if config filtered out
             if not self._check_if_config_passes_filters(
                 configuration, all_for_platform_type=False
             ):
                 continue
 
-            user_choice = None
-
-            # two name variants to check: original lean-key (hyphen) and python-variable (underscore)
-            lean_key = configuration._id
-            var_key = self.convert_lean_key_to_variable(lean_key)
-
-            # 1) check user_provided_options (CLI) in both forms
-            if (
-                var_key in user_provided_options
-                and user_provided_options[var_key] is not None
-            ):
-                user_choice = user_provided_options[var_key]
-                logger.debug(
-                    f"JsonModule({self._display_name}): user provided '{user_choice}' for '{var_key}'"
-                )
-            elif (
-                lean_key in user_provided_options
-                and user_provided_options[lean_key] is not None
-            ):
-                user_choice = user_provided_options[lean_key]
-                logger.debug(
-                    f"JsonModule({self._display_name}): user provided '{user_choice}' for '{lean_key}'"
-                )
-            else:
-                # 2) check properties (these come from the environment in lean.json) — *presence* means explicitly provided
-                if var_key in properties:
-                    # if present in properties, use its value (can be empty string)
-                    user_choice = properties[var_key]
-                    logger.debug(
-                        f"JsonModule({self._display_name}): property provided (from environment) '{var_key}' -> '{user_choice}'"
-                    )
-                elif lean_key in properties:
-                    user_choice = properties[lean_key]
-                    logger.debug(
-                        f"JsonModule({self._display_name}): property provided (from environment) '{lean_key}' -> '{user_choice}'"
-                    )
-                else:
-                    # 3) fallback: get default from lean_config (if any)
-                    try:
-                        user_choice = self.get_default(
-                            lean_config, lean_key, environment_name, logger
+            # 1) user_provided_options (CLI), 2) properties (these come from the environment in lean.json)
+            if var_key in resolved:
+                user_choice, provided_key, from_user = resolved[var_key]
+                if debug_logging_enabled:
+                    if from_user:
+                        logger.debug(
+                            f"JsonModule({self._display_name}): user provided '{user_choice}' for '{provided_key}'"
+                        )
+                    else:
+                        logger.debug(
+                            f"JsonModule({self._display_name}): property provided (from environment) '{provided_key}' -> '{user_choice}'"
                         )
-                    except Exception:
-                        user_choice = None
+            else:
+                # 3) fallback: get default from lean_config (if any)
+                user_choice = self.get_default(
+                    lean_config, lean_key, environment_name, logger, defaults
+                )
+                if debug_logging_enabled:
                     logger.debug(
                         f"JsonModule({self._display_name}): Configuration not provided '{lean_key}'"
                     )
@@ -440,7 +487,7 @@ class JsonModule(ABC):
                     user_choice = configuration.ask_user_for_input(
                         default_value, logger, hide_input=hide_input
                     )
-                    if not isinstance(configuration, BrokerageEnvConfiguration):
+                    if not configuration._is_brokerage_env:
                         try:
                             self._save_property({f"{configuration._id}": user_choice})
                         except Exception:
@@ -453,20 +500,14 @@ class JsonModule(ABC):
                     else:
                         # if the key existed in properties (even if empty) we've already assigned user_choice to that (possibly "")
                         # treat an explicitly-present-but-empty string as provided (do not mark as missing)
-                        present_in_properties = (lean_key in properties) or (
-                            var_key in properties
-                        )
-                        present_in_user_opts = (lean_key in user_provided_options) or (
-                            var_key in user_provided_options
-                        )
-
-                        if present_in_properties or present_in_user_opts:
+                        if var_key in explicitly_provided:
                             # keep user_choice as "" or None->"" so it's treated as explicitly provided
                             if user_choice is None:
                                 user_choice = ""
-                            logger.debug(
-                                f"JsonModule({self._display_name}): explicit empty provided for '{lean_key}' (properties/user opts)"
-                            )
+                            if debug_logging_enabled:
+                                logger.debug(
+                                    f"JsonModule({self._display_name}): explicit empty provided for '{lean_key}' (properties/user opts)"
+                                )
                         else:
                             # genuinely missing
                             missing_options.append(f"--{lean_key}")
@@ -483,14 +524,12 @@ class JsonModule(ABC):
         return self
 
     def get_paths_to_mount(self) -> Dict[str, str]:
+        filter_cache: Dict[Tuple[int, bool], bool] = {}
         return {
             config._id: config._value
-            for config in self._lean_configs
-            if (
-                isinstance(config, PathParameterUserInput)
-                and self._check_if_config_passes_filters(
-                    config, all_for_platform_type=False
-                )
+            for config in self._path_configs
+            if self._check_if_config_passes_filters(
+                config, all_for_platform_type=False, cache=filter_cache
             )
         }
 
@@ -517,30 +556,51 @@ class JsonModule(ABC):
             )
             self._is_module_installed = True
 
+    def _build_default_lookup(
+        self, lean_config: Dict[str, Any], environment_name: str
+    ) -> Dict[str, Any]:
+        """Flattens the lean config and the given environment into a single dict, the environment wins."""
+        if lean_config is None:
+            return {}
+        lookup = dict(lean_config)
+        environments = lean_config.get("environments")
+        if environment_name and isinstance(environments, dict):
+            environment = environments.get(environment_name)
+            if isinstance(environment, dict):
+                lookup.update(environment)
+        return lookup
+
     def get_default(
         self,
         lean_config: Dict[str, Any],
         key: str,
         environment_name: str,
         logger: Logger,
+        lookup: Dict[str, Any] = None,
     ):
-        user_choice = None
-        if lean_config is not None:
-            if (
-                environment_name
-                and "environments" in lean_config
-                and environment_name in lean_config["environments"]
-                and key in lean_config["environments"][environment_name]
-            ):
-                user_choice = lean_config["environments"][environment_name][key]
-                logger.debug(
-                    f"JsonModule({self._display_name}): found '{user_choice}' for '{key}', in environment"
-                )
-            elif key in lean_config:
-                user_choice = lean_config[key]
-                logger.debug(
-                    f"JsonModule({self._display_name}): found '{user_choice}' for '{key}'"
+        """Returns the value of key in the environment, or else in the lean config.
+
+        :param lookup: the result of _build_default_lookup() for lean_config and environment_name, for callers
+            resolving many keys, the lean config is read directly if omitted
+        """
+        if lookup is None:
+            lookup = {}
+            if lean_config is not None:
+                environments = lean_config.get("environments")
+                environment = (
+                    environments.get(environment_name)
+                    if environment_name and isinstance(environments, dict)
+                    else None
                 )
+                if isinstance(environment, dict) and key in environment:
+                    lookup = environment
+                else:
+                    lookup = lean_config
+        user_choice = lookup.get(key)
+        if key in lookup and getattr(logger, "debug_logging_enabled", True):
+            logger.debug(
+                f"JsonModule({self._display_name}): found '{user_choice}' for '{key}'"
+            )
         return user_choice
 
     def __repr__(self):
@@ -1,29 +1,28 @@
 #!/usr/bin/env python3
 # smoke_test_config_build_patch.py
 import inspect
-import importlib
 import traceback
 import sys
 from types import SimpleNamespace
 
 print(">>> Importing lean.models.json_module ...")
 try:
-    mod = importlib.import_module("lean.models.json_module")
-    print("Module import OK:", mod.__name__)
-except Exception:
+    from lean.models.json_module import JsonModule
+    print("Module import OK:", JsonModule.__module__)
+except ImportError:
     print("Module import FAILED")
     traceback.print_exc()
     sys.exit(2)
 
 # Show presence of function
-has_cfg = hasattr(mod.JsonModule, "config_build")
+has_cfg = hasattr(JsonModule, "config_build")
 print("config_build present:", has_cfg)
 if not has_cfg:
     print("ERROR: config_build not found on JsonModule")
     sys.exit(3)
 
 # Print first lines of the function for manual verification
-src = inspect.getsource(mod.JsonModule.config_build)
+src = inspect.getsource(JsonModule.config_build)
 print("\n>>> config_build() preview (first 30 lines):\n")
 print("\n".join(src.splitlines()[:30]))
 
@@ -31,7 +30,7 @@ print("\n".join(src.splitlines()[:30]))
 print("\n>>> Attempt minimal run: instantiate a dummy subclass and call config_build() non-interactively.")
 try:
     # Create a minimal JsonModule subclass that avoids heavy initialization
-    class Dummy(mod.JsonModule):
+    class Dummy(JsonModule):
         def __init__(self):
             # avoid calling super().__init__ which expects complex json_module_data
             # Instead set just the fields used by config_build
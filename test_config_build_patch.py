@@ -1,28 +1,38 @@
 # test_config_build_patch.py
-import importlib
-import inspect
+import linecache
 import sys
 
-try:
-    mod = importlib.import_module("lean.models.json_module")
-    JsonModule = mod.JsonModule
-    print("Module import OK: lean.models.json_module")
-except Exception as e:
-    print("FAILED to import lean.models.json_module:", e)
-    sys.exit(2)
 
-# Ensure config_build exists and print its signature / first lines for verification
-if hasattr(JsonModule, "config_build"):
+def check_config_build(json_module) -> int:
+    JsonModule = json_module.JsonModule
+
+    # Ensure config_build exists and print its signature / first lines for verification
+    if not hasattr(JsonModule, "config_build"):
+        print("JsonModule has no attribute 'config_build' — patch not applied.")
+        return 3
+
     print()
     print("Found JsonModule.config_build(), signature and first lines:")
-    src = inspect.getsource(JsonModule.config_build)
-    first_lines = "\n".join(src.splitlines()[:20])
-    print(first_lines)
+    code = JsonModule.config_build.__code__
+    lines = linecache.getlines(code.co_filename)
+    first_lines = "".join(lines[code.co_firstlineno - 1:code.co_firstlineno + 19])
+    print(first_lines, end="")
     print()
     print("Test hint: now run a real deploy (or run your existing test harness).")
     print("Output marker: CONFIG_BUILD_OK")
-    sys.exit(0)
-else:
-    print("JsonModule has no attribute 'config_build' — patch not applied.")
-    sys.exit(3)
+    return 0
+
+
+def test_config_build_patch(json_module):
+    assert check_config_build(json_module) == 0
+
+
+if __name__ == "__main__":
+    try:
+        import lean.models.json_module as json_module
+        print("Module import OK: lean.models.json_module")
+    except ImportError as e:
+        print("FAILED to import lean.models.json_module:", e)
+        sys.exit(2)
 
+    sys.exit(check_config_build(json_module))
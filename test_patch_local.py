@@ -1,27 +1,12 @@
 # test_patch_local.py
-from importlib import import_module
-import traceback
-
-print(">>> Importing module lean.models.json_module ...")
-try:
-    mod = import_module("lean.models.json_module")
-    print("Module import OK:", mod.__name__)
-except Exception as e:
-    print("Module import FAILED")
-    traceback.print_exc()
-    raise SystemExit(1)
-
-JsonModule = mod.JsonModule
-
-print("\n>>> Inspecting patched functions signatures...")
-print("get_settings present:", hasattr(JsonModule, "get_settings"))
-print("config_build present:", hasattr(JsonModule, "config_build"))
+import os
+import sys
 
 # Build a fake JsonModule instance with minimal config entries to exercise logic
 fake_json = {
     "id": "interactive-brokers",
     "display-id": "Interactive Brokers",
-    "configurations": [
+    "configurations": (
         # Minimal fake configuration entries to trigger conditional logic:
         {
             "id": "ib-account",
@@ -54,30 +39,55 @@ fake_json = {
             # value_options will be constructed by Configuration.factory normally;
             # we will patch an InternalInputUserInput object afterwards to add value options.
         }
-    ]
+    )
 }
 
 # Create instance; use factory that exists in the file (Configuration.factory)
 from lean.models.configuration import Configuration
-# Convert the provided dictionaries to configuration objects via the existing factory if possible,
-# otherwise create a simple fallback.
-try:
-    cfg_objs = [Configuration.factory(c) for c in fake_json["configurations"]]
-except Exception:
-    # Fallback: create minimal objects with attributes used by the functions
-    cfg_objs = []
-    class SimpleCfg:
-        def __init__(self, _id, optional=False, input_default=None):
-            self._id = _id
-            self._optional = optional
-            self._input_default = input_default
-            self._is_required_from_user = False
-            self._value = None
-            self._is_conditional = False
-            self._value_options = []
-            self._filter = type("F", (), {"_conditions": []})()
-        def ask_user_for_input(self, default, logger, hide_input=False):
-            return default
+# The class Configuration.factory resolves only depends on the type and input method of an entry, so it is
+# resolved once per pair and later entries are built with the cached class directly.
+_FACTORY_CACHE = {}
+def _build_configuration(c):
+    key = (c["type"], c.get("input-method"))
+    cls = _FACTORY_CACHE.get(key)
+    if cls is None:
+        cfg = Configuration.factory(c)
+        _FACTORY_CACHE[key] = type(cfg)
+        return cfg
+    return cls(c)
+
+
+# Fallback: minimal objects with attributes used by the functions, for when the factory can't build the entries
+class SimpleCfg:
+    # class flags JsonModule reads when indexing its configurations
+    _is_path_param = False
+    _is_auth = False
+    _is_brokerage_env = False
+
+    def __init__(self, _id, optional=False, input_default=None):
+        self._id = _id
+        self._optional = optional
+        self._input_default = input_default
+        self._is_required_from_user = False
+        self._value = None
+        self._is_conditional = False
+        self._value_options = []
+        self._filter = type("F", (), {"_conditions": []})()
+    def ask_user_for_input(self, default, logger, hide_input=False):
+        return default
+# Fake option with a condition object that won't match:
+class FakeCondition:
+    def __init__(self, dependent_config_id):
+        self._dependent_config_id = dependent_config_id
+    def check(self, val):
+        return False
+class FakeOption:
+    def __init__(self, cond):
+        self._condition = cond
+        self._value = "agent-x"
+
+
+def _build_fallback():
     cfg_objs = [
         SimpleCfg("ib-account", optional=False),
         SimpleCfg("ib-user-name", optional=True),
@@ -86,23 +96,18 @@ except Exception:
     ]
     # Mark last as conditional to force conditional code path:
     cfg_objs[-1]._is_conditional = True
-    # Create fake option with a condition object that won't match:
-    class FakeCondition:
-        def __init__(self, dependent_config_id):
-            self._dependent_config_id = dependent_config_id
-        def check(self, val):
-            return False
-    class FakeOption:
-        def __init__(self, cond):
-            self._condition = cond
-            self._value = "agent-x"
-    cfg_objs[-1]._value_options = [FakeOption(FakeCondition("ib-account"))]
-
-# Instantiate JsonModule (we supply minimal json_module_data)
-json_module_data = {"id": fake_json["id"], "display-id": fake_json["display-id"], "configurations": []}
-m = JsonModule(json_module_data, module_type="brokerage", platform="cli")
-# replace _lean_configs with our constructed cfg objects to control behavior
-m._lean_configs = cfg_objs
+    cfg_objs[-1]._value_options = (FakeOption(FakeCondition("ib-account")),)
+    return cfg_objs
+
+
+# Convert the provided dictionaries to configuration objects via the existing factory if possible,
+# otherwise use fresh fallback objects, config_build mutates them.
+def _build_cfg_objs():
+    try:
+        return [_build_configuration(c) for c in fake_json["configurations"]]
+    except Exception:
+        return _build_fallback()
+
 
 # Prepare a fake lean_config that has an environment with explicit empty string for user/password
 fake_lean_config = {
@@ -115,32 +120,80 @@ fake_lean_config = {
         }
     }
 }
-# provide a lightweight logger with debug/info/warning methods
+# provide a lightweight logger with debug/info/warn/warning methods, silenced when TEST_QUIET is set
+def _noop(*a, **k): pass
 class L:
-    def debug(self, *a, **k): print("DEBUG:", *a)
-    def info(self, *a, **k): print("INFO:", *a)
-    def warning(self, *a, **k): print("WARNING:", *a)
+    if os.environ.get("TEST_QUIET"):
+        # also lets config_build skip formatting its debug messages
+        debug_logging_enabled = False
+        debug = info = warn = warning = staticmethod(_noop)
+    else:
+        def debug(self, *a, **k): print("DEBUG:", *a)
+        def info(self, *a, **k): print("INFO:", *a)
+        def warning(self, *a, **k): print("WARNING:", *a)
+        warn = warning
 logger = L()
 
-print("\n>>> Running config_build in non-interactive mode (should not raise)...")
-try:
-    m.config_build(fake_lean_config, logger, interactive=False, user_provided_options={"ib_account":"DUO869864"}, environment_name="live-ibkr-local-history")
-    print("config_build(): OK")
-except Exception:
-    print("config_build() raised:")
-    traceback.print_exc()
-
-print("\n>>> Running get_settings() (should return a dict and not raise)...")
-try:
-    # put lean_config/env/logger into globals to mimic calling context (same as CLI path)
-    globals()["lean_config"] = fake_lean_config
-    globals()["environment_name"] = "live-ibkr-local-history"
-    globals()["logger"] = logger
-    s = m.get_settings()
-    print("get_settings() returned:", s)
-except Exception:
-    print("get_settings() raised:")
-    traceback.print_exc()
-
-print("\n>>> TEST DONE. Paste this entire output into the chat.")
 
+def run_test(json_module) -> bool:
+    print("\n>>> Inspecting patched functions signatures...")
+    print("get_settings present:", hasattr(json_module.JsonModule, "get_settings"))
+    print("config_build present:", hasattr(json_module.JsonModule, "config_build"))
+
+    # Instantiate JsonModule (we supply minimal json_module_data)
+    json_module_data = {"id": fake_json["id"], "display-id": fake_json["display-id"], "configurations": []}
+    m = json_module.JsonModule(json_module_data, module_type="brokerage", platform="cli")
+    # replace _lean_configs with our constructed cfg objects to control behavior
+    m._lean_configs = _build_cfg_objs()
+
+    ok = True
+    print("\n>>> Running config_build in non-interactive mode (should not raise)...")
+    try:
+        m.config_build(fake_lean_config, logger, interactive=False, user_provided_options={"ib_account":"DUO869864"}, environment_name="live-ibkr-local-history")
+        print("config_build(): OK")
+    except Exception:
+        ok = False
+        print("config_build() raised:")
+        import traceback
+        traceback.print_exc()
+
+    print("\n>>> Running get_settings() (should return a dict and not raise)...")
+    try:
+        s = m.get_settings(lean_config=fake_lean_config, environment_name="live-ibkr-local-history", logger=logger)
+        print("get_settings() returned:", s)
+    except Exception:
+        ok = False
+        print("get_settings() raised:")
+        import traceback
+        traceback.print_exc()
+    return ok
+
+
+def test_patch_local(json_module):
+    assert run_test(json_module)
+
+
+def test_patch_local_fallback(json_module, monkeypatch):
+    def _fail(c):
+        raise ValueError("factory unavailable")
+    monkeypatch.setattr(sys.modules[__name__], "_build_configuration", _fail)
+    # every run gets its own fallback objects
+    assert _build_cfg_objs() is not _build_cfg_objs()
+    assert run_test(json_module)
+    assert run_test(json_module)
+
+
+if __name__ == "__main__":
+    print(">>> Importing module lean.models.json_module ...")
+    try:
+        import lean.models.json_module as json_module
+        print("Module import OK:", json_module.__name__)
+    except ImportError:
+        print("Module import FAILED")
+        import traceback
+        traceback.print_exc()
+        raise SystemExit(1)
+
+    run_test(json_module)
+
+    print("\n>>> TEST DONE. Paste this entire output into the chat.")
@@ -1,30 +1,34 @@
 # test_update_settings_parse.py
-from types import SimpleNamespace
+import marshal
+
 from lean.components.util.logger import Logger
 
+# environment properties of each parse case, _update_settings only reads them
+_PROPERTIES_SAMPLES = {
+    "case_none_string": {"data-queue-handler": "None"},
+    "case_empty_string": {"data-queue-handler": ""},
+    "case_json_array": {"data-queue-handler": '["A","B"]'},
+    "case_python_list": {"data-queue-handler": ["X","Y"]},
+    "case_comma_csv": {"data-queue-handler": "A, B, C"},
+    "case_scalar_string": {"data-queue-handler": "singleValue"},
+}
+
 def run_test():
     logger = Logger()
     # base target that simulates existing module settings
     base_target = {
-        "data-queue-handler": ["QuantConnect.Brokerages.InteractiveBrokers.InteractiveBrokersBrokerage"]
-    }
-
-    properties_samples = {
-        "case_none_string": {"data-queue-handler": "None"},
-        "case_empty_string": {"data-queue-handler": ""},
-        "case_json_array": {"data-queue-handler": '["A","B"]'},
-        "case_python_list": {"data-queue-handler": ["X","Y"]},
-        "case_comma_csv": {"data-queue-handler": "A, B, C"},
-        "case_scalar_string": {"data-queue-handler": "singleValue"},
+        "data-queue-handler": ("QuantConnect.Brokerages.InteractiveBrokers.InteractiveBrokersBrokerage",)
     }
+    # serialized once with mutable lists, every case rehydrates a fresh copy from it
+    base_target_blob = marshal.dumps({k: list(v) for k, v in base_target.items()})
 
     from lean.components.util import json_modules_handler
 
     print("RUNNING PARSE TESTS")
-    for name, props in properties_samples.items():
+    for name, props in _PROPERTIES_SAMPLES.items():
         print("\n---", name, "---")
         # prepare a fresh target copy for each test
-        tgt = {k: list(v) for k, v in base_target.items()}
+        tgt = marshal.loads(base_target_blob)
 
         # prepare lean_config simulating environments -> env -> properties
         lean_config = {"environments": {"env": {"properties": props}}}
@@ -14,8 +14,9 @@ from unittest.mock import MagicMock
 
 import pytest
 
-from lean.components.util.json_modules_handler import find_module
-from lean.constants import MODULE_CLI_PLATFORM, MODULE_BROKERAGE
+from lean.components.util.json_modules_handler import _update_settings, find_module
+from lean.constants import MODULE_CLI_PLATFORM, MODULE_BROKERAGE, MODULE_TYPE
+from lean.models.configuration import InternalInputUserInput
 from lean.models.json_module import JsonModule
 from tests.test_helpers import create_fake_lean_cli_directory
 
@@ -47,3 +48,285 @@ def test_is_value_in_config(searching: str, expected: bool) -> None:
     result = module.is_value_in_config(searching)
 
     assert expected == result
+
+
+def test_find_module_prefers_first_module_in_list() -> None:
+    create_fake_lean_cli_directory()
+
+    first = JsonModule({"id": "a", "configurations": [], "display-id": "Binance"},
+                       MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+    second = JsonModule({"id": "qc.brokerage.binance", "configurations": [], "display-id": "b"},
+                        MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+    result = find_module("QC.Brokerage.Binance", [first, second], MagicMock())
+    assert result == first
+
+
+def test_find_module_accepts_logger_without_debug_flag() -> None:
+    module = JsonModule({"id": "a", "configurations": [], "display-id": "A"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+    logger = MagicMock(spec=["debug"])
+
+    assert find_module("a", [module], logger) == module
+    logger.debug.assert_called_once()
+
+
+def test_find_module_sees_modules_added_to_the_list() -> None:
+    create_fake_lean_cli_directory()
+
+    first = JsonModule({"id": "a", "configurations": [], "display-id": "A"},
+                       MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+    second = JsonModule({"id": "b", "configurations": [], "display-id": "B"},
+                        MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+    module_list = [first]
+    assert find_module("a", module_list, MagicMock()) == first
+
+    module_list.append(second)
+    assert find_module("b", module_list, MagicMock()) == second
+
+
+@pytest.mark.parametrize("value,expected", [("None", ["Existing"]),
+                                            ("", ["Existing"]),
+                                            ('["A","B"]', ["Existing", "A", "B"]),
+                                            (["X", "Existing"], ["Existing", "X"]),
+                                            ("A, B, C", ["Existing", "A", "B", "C"]),
+                                            ('"A"', ["Existing", "A"]),
+                                            ("[A, B", ["Existing", "[A", "B"]),
+                                            (("X", "Y"), ["Existing", "X", "Y"]),
+                                            (" singleValue ", ["Existing", "singleValue"])])
+def test_update_settings_merges_list_like_property(value, expected) -> None:
+    target = {"data-queue-handler": ["Existing"]}
+    lean_config = {"environments": {"env": {"properties": {"data-queue-handler": value}}}}
+
+    _update_settings(MagicMock(), "env", target, lean_config)
+
+    assert target["data-queue-handler"] == expected
+
+
+def test_update_settings_assigns_and_overwrites_properties() -> None:
+    target = {"existing": "old"}
+    lean_config = {"environments": {"env": {"properties": {"existing": "new",
+                                                           "added": "value",
+                                                           "skipped": None,
+                                                           "data-queue-handler": ["A"]}}}}
+
+    _update_settings(MagicMock(), "env", target, lean_config)
+
+    assert target == {"existing": "new", "added": "value", "data-queue-handler": ["A"]}
+
+
+def test_update_settings_leaves_target_untouched_without_environment_properties() -> None:
+    target = {"existing": "old"}
+    logger = MagicMock()
+
+    _update_settings(logger, "env", target, {"environments": {"env": {}}})
+
+    assert target == {"existing": "old"}
+    logger.debug.assert_not_called()
+
+
+def test_update_settings_reads_environment_properties_on_every_call() -> None:
+    lean_config = {"environments": {"env": {}}}
+    target = {}
+
+    _update_settings(MagicMock(), "env", target, lean_config)
+    lean_config["environments"]["env"]["properties"] = {"a": "1"}
+    _update_settings(MagicMock(), "env", target, lean_config)
+    assert target == {"a": "1"}
+
+    lean_config["environments"] = {"env": {"properties": {"b": "2"}}}
+    target = {}
+    _update_settings(MagicMock(), "env", target, lean_config)
+    assert target == {"b": "2"}
+
+
+def test_get_config_value_from_name_follows_reassigned_configs() -> None:
+    module = JsonModule({"id": "asd", "configurations": [
+        {
+            "id": "live-mode-brokerage",
+            "type": "info",
+            "value": "BinanceFuturesBrokerage"
+        }
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    assert module.get_config_value_from_name("live-mode-brokerage") == "BinanceFuturesBrokerage"
+
+    module._lean_configs = []
+
+    with pytest.raises(KeyError):
+        module.get_config_value_from_name("live-mode-brokerage")
+
+
+def test_check_if_config_passes_filters_checks_conditions_after_dict_value() -> None:
+    def condition(dependent_config_id: str, pattern: str):
+        return {"condition": {"type": "exact-match", "pattern": pattern, "dependent-config-id": dependent_config_id}}
+
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "auth", "type": "info", "value": ""},
+        {"id": "mode", "type": "info", "value": "paper"},
+        {"id": "filtered", "type": "info", "value": "value",
+         "filters": [condition("auth", "token"), condition("mode", "live")]}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+    module._configs_by_id["auth"]._value = {"access-token": "token"}
+
+    assert not module._check_if_config_passes_filters(module._configs_by_id["filtered"], all_for_platform_type=False)
+
+    module._configs_by_id["mode"]._value = "live"
+
+    assert module._check_if_config_passes_filters(module._configs_by_id["filtered"], all_for_platform_type=False)
+
+
+def test_config_build_accepts_lean_keys_and_variable_names() -> None:
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "ib-account", "type": "input", "input-method": "prompt"},
+        {"id": "ib-user-name", "type": "input", "input-method": "prompt"}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    module.config_build({}, MagicMock(), interactive=False,
+                        user_provided_options={"ib_account": "account"},
+                        properties={"ib-user-name": "user"})
+
+    assert module.get_config_value_from_name("ib-account") == "account"
+    assert module.get_config_value_from_name("ib-user-name") == "user"
+
+
+def test_sort_configs_orders_environment_configs_first_and_filtered_configs_last() -> None:
+    filters = [{"condition": {"type": "exact-match", "pattern": "a", "dependent-config-id": "first"}}]
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "filtered", "type": "info", "value": "", "filters": filters},
+        {"id": "first", "type": "info", "value": ""},
+        {"id": "environment", "type": "filter-env", "input-method": "choice"},
+        {"id": "second", "type": "info", "value": "", "filters": []}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    assert [config._id for config in module._lean_configs] == ["environment", "first", "second", "filtered"]
+
+
+def test_get_settings_resolves_conditional_internal_input() -> None:
+    def option(value: str, pattern: str):
+        return {"value": value,
+                "condition": {"type": "exact-match", "pattern": pattern, "dependent-config-id": "mode"}}
+
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "mode", "type": "info", "value": "live"},
+        {"id": "agent", "type": "internal-input", "value-options": [option("paper-agent", "paper"),
+                                                                    option("live-agent", "live")]}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    assert module.get_settings() == {"id": "asd", "mode": "live", "agent": "live-agent"}
+
+
+def test_get_settings_prefills_from_given_lean_config() -> None:
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "mode", "type": "internal-input"},
+        {"id": "agent", "type": "internal-input", "value-options": [
+            {"value": "live-agent",
+             "condition": {"type": "exact-match", "pattern": "live", "dependent-config-id": "mode"}}
+        ]}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+    for config in module._lean_configs:
+        config._value = None
+    lean_config = {"mode": "paper", "environments": {"env": {"mode": "live"}}}
+    logger = MagicMock()
+
+    settings = module.get_settings(lean_config=lean_config, environment_name="env", logger=logger)
+
+    assert settings == {"id": "asd", "mode": "live", "agent": "live-agent"}
+    logger.warn.assert_not_called()
+
+
+def test_get_default_prefers_environment_over_lean_config() -> None:
+    module = JsonModule({"id": "asd", "configurations": [], "display-id": "OUS"},
+                        MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+    lean_config = {"key": "global", "other": "global", "environments": {"env": {"key": "environment"}}}
+
+    assert module.get_default(lean_config, "key", "env", MagicMock()) == "environment"
+    assert module.get_default(lean_config, "other", "env", MagicMock()) == "global"
+    assert module.get_default(lean_config, "key", None, MagicMock()) == "global"
+    assert module.get_default(lean_config, "missing", "env", MagicMock()) is None
+
+    lookup = module._build_default_lookup(lean_config, "env")
+    assert module.get_default(lean_config, "key", "env", MagicMock(), lookup) == "environment"
+    assert module.get_default(lean_config, "other", "env", MagicMock(), lookup) == "global"
+
+
+def test_get_settings_skips_configs_filtered_on_missing_configs() -> None:
+    filters = [{"condition": {"type": "exact-match", "pattern": "a", "dependent-config-id": "missing"}}]
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "filtered", "type": "info", "value": "value", "filters": filters}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    assert module.get_settings() == {"id": "asd"}
+
+
+def test_is_value_in_config_follows_value_changes() -> None:
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "live-mode-brokerage", "type": "info", "value": "BinanceFuturesBrokerage"},
+        {"id": "handlers", "type": "info", "value": ["BinanceDataQueue"]}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    assert module.is_value_in_config("futuresbrokerage")
+    assert module.is_value_in_config("binancedataqueue")
+    assert not module.is_value_in_config("binance\0binance")
+
+    module._configs_by_id["live-mode-brokerage"]._value = "KrakenBrokerage"
+
+    assert module.is_value_in_config("kraken")
+    assert not module.is_value_in_config("futuresbrokerage")
+
+    module._configs_by_id["handlers"]._value.append("KrakenDataQueue")
+
+    assert module.is_value_in_config("krakendataqueue")
+
+
+def test_get_paths_to_mount_returns_unfiltered_path_configs() -> None:
+    filters = [{"condition": {"type": "exact-match", "pattern": "other", "dependent-config-id": "mode"}}]
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "mode", "type": "info", "value": "local"},
+        {"id": "path", "type": "input", "input-method": "path-parameter", "value": "/data/file.json"},
+        {"id": "filtered-path", "type": "input", "input-method": "path-parameter", "value": "/data/other.json",
+         "filters": filters}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    assert module.get_paths_to_mount() == {"path": "/data/file.json"}
+
+
+def test_config_build_resolves_filter_dependencies_first() -> None:
+    def condition(dependent_config_id: str, pattern: str):
+        return {"condition": {"type": "exact-match", "pattern": pattern, "dependent-config-id": dependent_config_id}}
+
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "account", "type": "input", "input-method": "prompt", "filters": [condition("mode", "live")]},
+        {"id": "mode", "type": "input", "input-method": "prompt",
+         "filters": [condition(MODULE_TYPE, MODULE_BROKERAGE)]}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    module.config_build({}, MagicMock(), interactive=False,
+                        user_provided_options={"mode": "live", "account": "account"})
+
+    assert module.get_config_value_from_name("account") == "account"
+
+
+def test_config_build_prefers_user_options_over_properties() -> None:
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "ib-account", "type": "input", "input-method": "prompt"},
+        {"id": "ib-user-name", "type": "input", "input-method": "prompt"},
+        {"id": "ib-password", "type": "input", "input-method": "prompt"}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    module.config_build({}, MagicMock(), interactive=False,
+                        user_provided_options={"ib_account": "user", "ib_user_name": None, "ib_password": None},
+                        properties={"ib-account": "property", "ib-user-name": "property", "ib-password": ""})
+
+    assert module.get_config_value_from_name("ib-account") == "user"
+    assert module.get_config_value_from_name("ib-user-name") == "property"
+    assert module.get_config_value_from_name("ib-password") == ""
+
+
+def test_get_all_input_configs_leaves_out_filtered_types() -> None:
+    module = JsonModule({"id": "asd", "configurations": [
+        {"id": "account", "type": "input", "input-method": "prompt"},
+        {"id": "info", "type": "info", "value": "value"},
+        {"id": "internal", "type": "internal-input"}
+    ], "display-id": "OUS"}, MODULE_BROKERAGE, MODULE_CLI_PLATFORM)
+
+    assert [config._id for config in module.get_all_input_configs()] == ["account", "internal"]
+    assert list(module.get_all_input_configs([InternalInputUserInput])) == [module._configs_by_id["account"]]